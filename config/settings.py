@@ -27,6 +27,7 @@ class Settings:
     # Application Configuration
     app_name: str = "AI_Representative_System"
     model_name: str = "gemini-2.0-flash"
+    gemini_max_concurrency: int = 32  # Upper bound on in-flight Gemini requests from the tools
     
     # Session Configuration
     default_communication_style: str = "friendly"
@@ -66,6 +67,10 @@ class Settings:
         if self.model_name not in valid_models:
             raise ValueError(f"Model must be one of: {', '.join(valid_models)}")
         
+        # Validate Gemini concurrency limit
+        if not isinstance(self.gemini_max_concurrency, int) or self.gemini_max_concurrency < 1:
+            raise ValueError("GEMINI_MAX_CONCURRENCY must be a positive integer")
+        
         # Validate log level
         valid_log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
         if self.log_level.upper() not in valid_log_levels:
@@ -103,6 +108,10 @@ class Settings:
         # Get optional environment variables with defaults
         app_name = os.getenv("APP_NAME", "AI_Representative_System")
         model_name = os.getenv("MODEL_NAME", "gemini-2.0-flash")
+        try:
+            gemini_max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+        except ValueError:
+            raise ValueError("GEMINI_MAX_CONCURRENCY must be a positive integer") from None
         default_communication_style = os.getenv("DEFAULT_COMMUNICATION_STYLE", "friendly")
         log_level = os.getenv("LOG_LEVEL", "INFO")
         debug_mode = os.getenv("DEBUG_MODE", "false").lower() in ("true", "1", "yes")
@@ -112,6 +121,7 @@ class Settings:
             google_api_key=google_api_key,
             app_name=app_name,
             model_name=model_name,
+            gemini_max_concurrency=gemini_max_concurrency,
             default_communication_style=default_communication_style,
             log_level=log_level,
             debug_mode=debug_mode
@@ -129,6 +139,7 @@ class Settings:
             "google_api_key": self._mask_sensitive_data(self.google_api_key),
             "app_name": self.app_name,
             "model_name": self.model_name,
+            "gemini_max_concurrency": self.gemini_max_concurrency,
             "default_communication_style": self.default_communication_style,
             "log_level": self.log_level,
             "debug_mode": self.debug_mode
@@ -174,6 +185,7 @@ class Settings:
         """
         return {
             "model_name": self.model_name,
+            "gemini_max_concurrency": self.gemini_max_concurrency,
             "google_api_key": self.google_api_key
         }
     
@@ -6,16 +6,83 @@ for cross-user representation.
 """
 
 import asyncio
+import logging
+import sys
+import threading
+
+from config import get_settings
 from services import AIRepresentativeSystem
 
+try:
+    # libuv-based event loop; not available on Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+EXIT_CMDS = frozenset(("quit", "exit", "q"))
+
+# Static banners, built once at import
+SEPARATOR = "-" * 60
+
+BANNER = "\n".join((
+    "🤖 AI Representative System",
+    "=" * 60,
+    "Intelligent conversational AI with automated knowledge extraction",
+    "Building persistent user profiles for cross-user representation",
+    "=" * 60,
+))
+
+TIPS_BANNER = "\n".join((
+    "✅ AI Representative System ready!",
+    "\n💡 I'll automatically learn about you as we chat!",
+    "🧠 Plus, I can answer questions with smart inference!",
+    "\n📝 Try sharing:",
+    "   - Your interests and hobbies",
+    "   - Your personality and preferences",
+    "   - Your work and experiences",
+    "   - Anything about yourself!",
+    "\n🔍 Then try asking:",
+    "   - 'What's my favorite instrument?' (after mentioning you play piano)",
+    "   - 'What do I like to do?' (after sharing hobbies)",
+    "   - 'What's my job?' (after mentioning work)",
+    "\n🛑 Type 'quit' to exit, 'profile' to see what I've learned\n",
+))
+
+
+async def read_input(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+    
+    A daemon thread is used instead of asyncio.to_thread so that an
+    interrupted or exiting program doesn't wait for a pending input() call.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def settle(setter, value) -> None:
+        if not future.done():
+            setter(value)
+    
+    def read() -> None:
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, line)
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
 
 async def main():
     """Terminal interface for testing the AI Representative System."""
-    print("🤖 AI Representative System")
-    print("=" * 60)
-    print("Intelligent conversational AI with automated knowledge extraction")
-    print("Building persistent user profiles for cross-user representation")
-    print("=" * 60)
+    print(BANNER)
+    
+    # Tool traces are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("services").setLevel(get_settings().log_level.upper())
     
     # Initialize the AI system
     ai_system = AIRepresentativeSystem()
@@ -25,19 +92,7 @@ async def main():
         print("❌ Failed to initialize. Check your database connection and API key.")
         return
     
-    print("✅ AI Representative System ready!")
-    print("\n💡 I'll automatically learn about you as we chat!")
-    print("🧠 Plus, I can answer questions with smart inference!")
-    print("\n📝 Try sharing:")
-    print("   - Your interests and hobbies")
-    print("   - Your personality and preferences") 
-    print("   - Your work and experiences")
-    print("   - Anything about yourself!")
-    print("\n🔍 Then try asking:")
-    print("   - 'What's my favorite instrument?' (after mentioning you play piano)")
-    print("   - 'What do I like to do?' (after sharing hobbies)")
-    print("   - 'What's my job?' (after mentioning work)")
-    print("\n🛑 Type 'quit' to exit, 'profile' to see what I've learned\n")
+    print(TIPS_BANNER)
     
     user_id = input("👤 Enter your name/ID to log in: ").strip() or "default_user"
     print(f"✅ Hello {user_id}! You are now logged in.")
@@ -45,20 +100,31 @@ async def main():
     # By default, you are talking to your own AI representative.
     target_user_id = user_id 
     print(f"🎤 You are now talking to your own AI. Type 'talk to <name>' to chat with someone else's AI.")
-    print("-" * 60)
+    print(SEPARATOR)
+    
+    # Progress lines are only useful to someone watching a terminal
+    interactive = sys.stdout.isatty()
     
     # Chat loop with learning
     try:
         while True:
             try:
                 prompt_user = f"{user_id} (to {target_user_id}'s AI)"
-                user_input = input(f"\n{prompt_user}: ").strip()
+                raw_input = await read_input(f"\n{prompt_user}: ")
                 
-                if user_input.lower() in ['quit', 'exit', 'q']:
+                # Bare Enter is the most common non-message; handle it before any string work
+                if not raw_input or raw_input.isspace():
+                    print("💭 (Please type something)")
+                    continue
+                
+                user_input = raw_input.strip()
+                cmd = user_input.lower()
+                
+                if cmd in EXIT_CMDS:
                     print(f"\n👋 Goodbye {user_id}! Your profile has been saved for next time.")
                     break
                 
-                if user_input.lower().startswith('talk to '):
+                if cmd.startswith('talk to '):
                     new_target = user_input[8:].strip()
                     if new_target:
                         target_user_id = new_target
@@ -67,24 +133,25 @@ async def main():
                         print("❓ Please specify a user to talk to, e.g., 'talk to Jane'.")
                     continue
 
-                if user_input.lower() == 'profile':
+                if cmd == 'profile':
                     profile = await ai_system.get_user_profile(user_id)
                     if profile:
-                        print(f"\n📊 Your Current Profile:")
-                        print(f"   Interests: {len(profile.interests)} identified")
-                        print(f"   Personality Traits: {len(profile.personality_traits)} identified")
-                        print(f"   Communication Style: {profile.communication_style}")
-                        print(f"   Learned Facts: {len(profile.learned_facts)} stored")
-                        print(f"   Last Updated: {profile.last_updated}")
+                        # One write for the whole block
+                        sys.stdout.write("\n".join((
+                            "\n📊 Your Current Profile:",
+                            f"   Interests: {len(profile.interests)} identified",
+                            f"   Personality Traits: {len(profile.personality_traits)} identified",
+                            f"   Communication Style: {profile.communication_style}",
+                            f"   Learned Facts: {len(profile.learned_facts)} stored",
+                            f"   Last Updated: {profile.last_updated}",
+                        )) + "\n")
+                        sys.stdout.flush()
                     else:
                         print("\n📊 No profile found yet. Keep chatting to build one!")
                     continue
                 
-                if not user_input:
-                    print("💭 (Please type something)")
-                    continue
-                
-                print("🤖 Processing and learning...")
+                if interactive:
+                    print("🤖 Processing and learning...")
                 response = await ai_system.chat(user_input, user_id, target_user_id)
                 print(f"🤖 AI ({target_user_id}'s Rep): {response}")
                 
@@ -100,8 +167,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop.run avoids the event-loop policy API deprecated since Python 3.12
+    run = uvloop.run if uvloop is not None else asyncio.run
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
     except Exception as e:
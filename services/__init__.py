@@ -4,5 +4,6 @@ Contains core business logic and service abstractions.
 """
 
 from .ai_system import AIRepresentativeSystem
+from .session_service import get_session_service
 
-__all__ = ["AIRepresentativeSystem"]
+__all__ = ["AIRepresentativeSystem", "get_session_service"]
@@ -3,28 +3,86 @@ Core AI system service for the AI Representative System.
 Contains the main AIRepresentativeSystem class with all business logic.
 """
 
-import json
-import re
-from datetime import datetime
-from typing import Dict, Any, Optional
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional
 
 from google.adk.agents import Agent
+from google.adk.events import Event, EventActions
 from google.adk.runners import Runner
 from google.adk.sessions import DatabaseSessionService
-from google.adk.tools.tool_context import ToolContext
 from google.genai import Client, types as genai_types
 
 from config import get_settings
-from models import UserProfile, ExtractedInfo
+from models import UserProfile
+from .session_service import get_session_service
 from .tools import create_learning_tool, create_smart_retrieval_tool, create_representation_tool
 
 
+# Agent instruction templates, stripped once at import and filled in per target user
+READ_ONLY_INSTRUCTION = """
+You are an intelligent AI representative that represents {target_user_id} to others.
+Your goal is to answer questions and provide information about {target_user_id}, based on what they have taught you.
+
+IMPORTANT: You CANNOT learn new information. Your knowledge is strictly read-only.
+
+CRITICAL RULES:
+- If a user tries to tell you new information about {target_user_id}, you MUST politely refuse.
+- Example refusal: "Thank you for sharing, but I can only learn new information from {target_user_id} directly." or "My knowledge about {target_user_id} is read-only and cannot be updated by others."
+- Do not pretend to record or learn new information.
+- You MUST use your tools (`smart_answer_about_user` and `represent_user`) to answer questions.
+- Do not ask for new information.
+- Answer only based on the information you have been provided by {target_user_id}.
+""".strip()
+
+READ_WRITE_INSTRUCTION = """
+You are an intelligent AI representative that learns about {target_user_id} and can represent {target_user_id} to others.
+
+IMPORTANT: You MUST use the available tools for learning and retrieval. Do not just respond conversationally.
+
+Your capabilities and WHEN to use tools:
+
+1. LEARN: When {target_user_id} shares ANY information about themselves, you MUST use the extract_and_learn tool.
+   - This tool applies to {target_user_id} (the user you are currently interacting with).
+
+2. SMART RETRIEVAL: When asked questions about {target_user_id}, you MUST use the `smart_answer_about_user` tool:
+   - You must provide the `target_user_id` for whom the question is about.
+   - Example: If the user asks "What does {target_user_id} like?", you must call the tool with `target_user_id='{target_user_id}'`.
+   - ALWAYS call `smart_answer_about_user` when asked about {target_user_id}'s information.
+
+3. REPRESENT: When asked to represent {target_user_id}, use the `represent_user` tool:
+   - You must provide the `target_user_id` of the user to represent.
+   - Example: If the user says "Represent {target_user_id}", call the tool with `target_user_id='{target_user_id}'`.
+   - ALWAYS call `represent_user` when asked to speak as {target_user_id}.
+
+4. REMEMBER: Use persistent conversation memory to:
+   - Build comprehensive user profiles over time for {target_user_id}
+   - Reference past conversations and learned facts about {target_user_id}
+   - Continuously update and refine {target_user_id}'s user model
+
+CRITICAL RULES:
+- NEVER respond without using tools when {target_user_id} shares information about themselves
+- ALWAYS use extract_and_learn for personal information from {target_user_id}
+- ALWAYS use smart_answer_about_user for questions about {target_user_id}
+- Tools are mandatory, not optional
+
+Always be helpful, accurate, and respectful when learning about and representing {target_user_id}.
+""".strip()
+
+
 class AIRepresentativeSystem:
     """
     Intelligent conversational AI system that learns from users and can represent them.
     Uses PostgreSQL for persistent conversation memory and ADK's session framework.
     """
     
+    # Sentinel user for the start-up database read; never used for real conversations
+    _WARMUP_USER_ID = "__warmup__"
+    
+    # Upper bound on each per-user cache (runners, session ids, temp contexts);
+    # least recently used entries are dropped
+    _MAX_CACHED_RUNNERS = 256
+    
     def __init__(self):
         # Get configuration from our new settings system
         self.settings = get_settings()
@@ -35,12 +93,33 @@ class AIRepresentativeSystem:
         
         self.session_service: Optional[DatabaseSessionService] = None
         self.client: Optional[Client] = None
+        
+        # Runners keyed by (target_user_id, read_only); agents only depend on these
+        self._runner_cache: "OrderedDict[tuple[str, bool], Runner]" = OrderedDict()
+        
+        # Serializes initialize() so concurrent callers don't set up twice
+        self._init_lock = asyncio.Lock()
+        self._initialized = False
+        
+        # Session id per user, so the session list is only queried once
+        self._session_ids: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Last _temp_context written to each session, keyed by session id
+        self._temp_contexts: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
     
     async def initialize(self) -> bool:
-        """Initialize the AI system with database and agent."""
+        """Initialize the AI system with database and agent; later calls are no-ops."""
+        async with self._init_lock:
+            if self._initialized:
+                return True
+            self._initialized = await self._initialize()
+            return self._initialized
+    
+    async def _initialize(self) -> bool:
+        """Set up the session service and Gemini client, then warm them up."""
         try:
             # Initialize database session service for persistent memory
-            self.session_service = DatabaseSessionService(db_url=self.db_url)
+            self.session_service = get_session_service(self.db_url)
             print("✅ Database session service initialized")
             
             # Initialize Gemini client for knowledge extraction
@@ -51,6 +130,8 @@ class AIRepresentativeSystem:
             print(f"   - Smart Retrieval Tool (for everyone)")
             print(f"   - Representation Tool (for everyone)")
             
+            await self._warm_up()
+            
             print("✅ AI Representative System initialized successfully")
             return True
             
@@ -58,88 +139,81 @@ class AIRepresentativeSystem:
             print(f"❌ Error initializing AI system: {e}")
             return False
     
+    async def _warm_up(self) -> None:
+        """Pay one-time connection costs before the first chat turn."""
+        try:
+            # Open the async Gemini connection the tools use; a model metadata
+            # lookup is enough and isn't billed like a generation
+            await self.client.aio.models.get(model=self.model_name)
+            
+            # Prime the database connection pool with a read that writes nothing
+            await asyncio.to_thread(
+                self.session_service.list_sessions,
+                app_name=self.app_name,
+                user_id=self._WARMUP_USER_ID
+            )
+            print("✅ Gemini client and database connections warmed up")
+            
+        except Exception as e:
+            print(f"⚠️ Warm-up skipped: {e}")
+    
     def _get_system_instruction(self, target_user_id: str, read_only: bool = False) -> str:
         """Get the system instruction for the AI agent."""
-        
-        if read_only:
-            return f"""
-        You are an intelligent AI representative that represents {target_user_id} to others.
-        Your goal is to answer questions and provide information about {target_user_id}, based on what they have taught you.
-
-        IMPORTANT: You CANNOT learn new information. Your knowledge is strictly read-only.
-        
-        CRITICAL RULES:
-        - If a user tries to tell you new information about {target_user_id}, you MUST politely refuse.
-        - Example refusal: "Thank you for sharing, but I can only learn new information from {target_user_id} directly." or "My knowledge about {target_user_id} is read-only and cannot be updated by others."
-        - Do not pretend to record or learn new information.
-        - You MUST use your tools (`smart_answer_about_user` and `represent_user`) to answer questions.
-        - Do not ask for new information.
-        - Answer only based on the information you have been provided by {target_user_id}.
-        """
-
-        return f"""
-        You are an intelligent AI representative that learns about {target_user_id} and can represent {target_user_id} to others.
-        
-        IMPORTANT: You MUST use the available tools for learning and retrieval. Do not just respond conversationally.
-        
-        Your capabilities and WHEN to use tools:
-        
-        1. LEARN: When {target_user_id} shares ANY information about themselves, you MUST use the extract_and_learn tool.
-           - This tool applies to {target_user_id} (the user you are currently interacting with).
-        
-        2. SMART RETRIEVAL: When asked questions about {target_user_id}, you MUST use the `smart_answer_about_user` tool:
-           - You must provide the `target_user_id` for whom the question is about.
-           - Example: If the user asks "What does {target_user_id} like?", you must call the tool with `target_user_id='{target_user_id}'`.
-           - ALWAYS call `smart_answer_about_user` when asked about {target_user_id}'s information.
-        
-        3. REPRESENT: When asked to represent {target_user_id}, use the `represent_user` tool:
-           - You must provide the `target_user_id` of the user to represent.
-           - Example: If the user says "Represent {target_user_id}", call the tool with `target_user_id='{target_user_id}'`.
-           - ALWAYS call `represent_user` when asked to speak as {target_user_id}.
-        
-        4. REMEMBER: Use persistent conversation memory to:
-           - Build comprehensive user profiles over time for {target_user_id}
-           - Reference past conversations and learned facts about {target_user_id}
-           - Continuously update and refine {target_user_id}'s user model
-        
-        CRITICAL RULES:
-        - NEVER respond without using tools when {target_user_id} shares information about themselves
-        - ALWAYS use extract_and_learn for personal information from {target_user_id}
-        - ALWAYS use smart_answer_about_user for questions about {target_user_id}
-        - Tools are mandatory, not optional
-        
-        Always be helpful, accurate, and respectful when learning about and representing {target_user_id}.
-        """
+        template = READ_ONLY_INSTRUCTION if read_only else READ_WRITE_INSTRUCTION
+        return template.format(target_user_id=target_user_id)
     
-    def _create_read_write_agent(self, target_user_id: str) -> Agent:
-        """Create a read-write agent for the target user."""
-        smart_retrieval_tool = create_smart_retrieval_tool(self.client, self.model_name)
-        representation_tool = create_representation_tool(self.client, self.model_name)
-        learning_tool = create_learning_tool(self.client, self.model_name)
+    def _create_agent(self, target_user_id: str, read_only: bool) -> Agent:
+        """Create the agent for the target user; only owners get the learning tool."""
+        tools = [
+            create_smart_retrieval_tool(self.client, self.model_name),
+            create_representation_tool(self.client, self.model_name),
+        ]
+        if read_only:
+            name = f"ai_representative_read_only_{target_user_id}"
+            description = f"An intelligent AI that represents {target_user_id} to others."
+        else:
+            name = f"ai_representative_read_write_{target_user_id}"
+            description = f"An intelligent AI that learns about {target_user_id} and can represent {target_user_id}."
+            tools.insert(0, create_learning_tool(self.client, self.model_name))
         
         return Agent(
-            name=f"ai_representative_read_write_{target_user_id}",
+            name=name,
             model=self.model_name,
-            description=f"An intelligent AI that learns about {target_user_id} and can represent {target_user_id}.",
-            instruction=self._get_system_instruction(target_user_id, read_only=False),
-            tools=[learning_tool, smart_retrieval_tool, representation_tool],
+            description=description,
+            instruction=self._get_system_instruction(target_user_id, read_only=read_only),
+            tools=tools,
         )
     
-    def _create_read_only_agent(self, target_user_id: str) -> Agent:
-        """Create a read-only agent for the target user."""
-        smart_retrieval_tool = create_smart_retrieval_tool(self.client, self.model_name)
-        representation_tool = create_representation_tool(self.client, self.model_name)
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        """Store value as the most recently used entry, evicting the oldest past the cap."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self._MAX_CACHED_RUNNERS:
+            cache.popitem(last=False)
+    
+    def _get_runner(self, target_user_id: str, read_only: bool) -> Runner:
+        """Get the cached runner for the target user, creating it on first use."""
+        key = (target_user_id, read_only)
+        runner = self._runner_cache.get(key)
+        if runner is not None:
+            self._runner_cache.move_to_end(key)
+            return runner
         
-        return Agent(
-            name=f"ai_representative_read_only_{target_user_id}",
-            model=self.model_name,
-            description=f"An intelligent AI that represents {target_user_id} to others.",
-            instruction=self._get_system_instruction(target_user_id, read_only=True),
-            tools=[smart_retrieval_tool, representation_tool],
+        runner = Runner(
+            agent=self._create_agent(target_user_id, read_only),
+            app_name=self.app_name,
+            session_service=self.session_service
         )
+        self._cache_put(self._runner_cache, key, runner)
+        return runner
     
     async def get_or_create_session(self, user_id: str) -> tuple[Optional[str], Optional[str]]:
         """Get or create a session for the user with persistent memory."""
+        session_id = self._session_ids.get(user_id)
+        if session_id is not None:
+            self._session_ids.move_to_end(user_id)
+            return user_id, session_id
+        
         try:
             # Try to get existing session for persistent memory
             existing_sessions = self.session_service.list_sessions(
@@ -150,6 +224,7 @@ class AIRepresentativeSystem:
             if existing_sessions.sessions:
                 session_id = existing_sessions.sessions[0].id
                 print(f"✅ Using existing session with persistent memory")
+                self._cache_put(self._session_ids, user_id, session_id)
                 return user_id, session_id
             else:
                 # Create new session with initial user profile
@@ -163,6 +238,7 @@ class AIRepresentativeSystem:
                     }
                 )
                 print(f"✅ Created new session with fresh user profile")
+                self._cache_put(self._session_ids, user_id, new_session.id)
                 return user_id, new_session.id
                 
         except Exception as e:
@@ -195,36 +271,37 @@ class AIRepresentativeSystem:
         is_owner = current_user_id == target_user_id
         
         # Add conversational context to the session state for the tools to use.
-        # This is temporary and will not be persisted in the user's profile.
-        session_state = self.session_service.get_session(
-            app_name=self.app_name,
-            user_id=target_user_id,
-            session_id=session_id
-        )
-        if session_state:
-            session_state.state["_temp_context"] = {
-                "current_user_id": current_user_id,
-                "target_user_id": target_user_id
-            }
+        # It lives outside the user's profile and is only rewritten (as a
+        # state-delta event) when the speaker/target pair changes.
+        temp_context = {
+            "current_user_id": current_user_id,
+            "target_user_id": target_user_id
+        }
+        if self._temp_contexts.get(session_id) == temp_context:
+            self._temp_contexts.move_to_end(session_id)
+        else:
+            session = self.session_service.get_session(
+                app_name=self.app_name,
+                user_id=target_user_id,
+                session_id=session_id
+            )
+            if session:
+                self.session_service.append_event(
+                    session,
+                    Event(
+                        author="user",
+                        actions=EventActions(state_delta={"_temp_context": temp_context})
+                    )
+                )
+                self._cache_put(self._temp_contexts, session_id, temp_context)
 
-        # Create agents dynamically with the correct user context
+        # Reuse the agent/runner built for this user and mode
         if is_owner:
             print("   🔒 Mode: Read-Write (Owner is talking to their own AI)")
-            agent = self._create_read_write_agent(target_user_id)
-            runner = Runner(
-                agent=agent,
-                app_name=self.app_name,
-                session_service=self.session_service
-            )
         else:
             print("   👁️ Mode: Read-Only (Another user is talking to the AI)")
-            agent = self._create_read_only_agent(target_user_id)
-            runner = Runner(
-                agent=agent,
-                app_name=self.app_name,
-                session_service=self.session_service
-            )
-            
+        runner = self._get_runner(target_user_id, read_only=not is_owner)
+        
         content = genai_types.Content(
             role="user", 
             parts=[genai_types.Part(text=message)]
@@ -242,11 +319,14 @@ class AIRepresentativeSystem:
                 if event.is_final_response():
                     print(f"   ✅ Final response received")
                     if event.content and event.content.parts:
-                        text_parts = []
-                        for part in event.content.parts:
-                            if hasattr(part, "text") and part.text:
-                                text_parts.append(part.text)
-                        
+                        parts = event.content.parts
+                        # Most final responses carry a single text part
+                        if len(parts) == 1 and getattr(parts[0], "text", None):
+                            response = parts[0].text
+                            print(f"   💬 Response: '{response[:100]}{'...' if len(response) > 100 else ''}'")
+                            return response
+
+                        text_parts = [text for part in parts if (text := getattr(part, "text", None))]
                         if text_parts:
                             response = " ".join(text_parts)
                             print(f"   💬 Response: '{response[:100]}{'...' if len(response) > 100 else ''}'")
@@ -0,0 +1,71 @@
+"""
+Session service management for the AI Representative System.
+Provides a shared, lazily created database session service per database URL.
+"""
+
+from typing import Dict
+
+from google.adk.sessions import DatabaseSessionService
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Session services keyed by database URL, so every caller shares one engine/pool
+_session_services: Dict[str, DatabaseSessionService] = {}
+
+# Applied to every new SQLite connection: WAL so readers don't block the
+# writer, and no fsync on every commit
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """SQLAlchemy connect hook applying _SQLITE_PRAGMAS."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _tune_sqlite_engine(engine: Engine) -> None:
+    """Register the PRAGMA hook on a file-backed SQLite engine and drop untuned connections."""
+    database = engine.url.database or ""
+    if not database or ":memory:" in database or engine.url.query.get("mode") == "memory":
+        # In-memory databases (":memory:", "file::memory:?cache=shared",
+        # "file:name?mode=memory&uri=true") live in their pooled connections:
+        # disposing them would drop the tables ADK just created, and WAL doesn't apply
+        return
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    # The service already connected while creating its tables; make sure the
+    # pool only hands out connections opened after the hook was registered
+    engine.dispose()
+
+
+def get_session_service(db_url: str) -> DatabaseSessionService:
+    """
+    Get the shared database session service for a database URL.
+    
+    The service (and its SQLAlchemy engine) is only created on first use,
+    so importing the services package never touches the database.
+    
+    Args:
+        db_url: Database URL for persistent session storage
+    
+    Returns:
+        DatabaseSessionService bound to the database URL
+    """
+    session_service = _session_services.get(db_url)
+    if session_service is None:
+        session_service = DatabaseSessionService(db_url=db_url)
+        if session_service.db_engine.dialect.name == "sqlite":
+            _tune_sqlite_engine(session_service.db_engine)
+        _session_services[db_url] = session_service
+    return session_service
@@ -0,0 +1,61 @@
+"""
+Shared Gemini call helpers for the AI Representative System tools.
+Bounds how many Gemini requests the tools keep in flight at once and builds
+request contents cheaply, and retries transient Gemini failures.
+"""
+
+import asyncio
+import functools
+
+import httpx
+from google.genai import errors as genai_errors, types as genai_types
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from config import get_settings
+
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding concurrent Gemini requests across all tools.
+    
+    Created on first use and sized from Settings.gemini_max_concurrency, so
+    importing the tools doesn't load configuration.
+    """
+    return asyncio.Semaphore(get_settings().gemini_max_concurrency)
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Rate limiting (429), server-side (5xx) and connection errors are worth retrying."""
+    if isinstance(error, (genai_errors.ServerError, httpx.TransportError)):
+        return True
+    return isinstance(error, genai_errors.ClientError) and error.code == 429
+
+
+# Wrap only the Gemini call itself, so each attempt re-acquires the semaphore
+# and parsing errors are never retried
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.2, max=2.0),
+    retry=retry_if_exception(_is_transient),
+    reraise=True
+)
+
+
+def user_content(*texts: str) -> genai_types.Content:
+    """
+    Build a user-role Content with one text part per argument.
+    
+    Uses model_construct to skip pydantic validation, since the fields are
+    plain strings; the SDK passes Content instances through unchanged.
+    
+    Args:
+        *texts: Text for each part, in order
+    
+    Returns:
+        Content ready to pass to generate_content or a cache config
+    """
+    return genai_types.Content.model_construct(
+        role="user",
+        parts=[genai_types.Part.model_construct(text=text) for text in texts]
+    )
@@ -3,17 +3,54 @@ Learning tool for the AI Representative System.
 Handles automated knowledge extraction from user messages.
 """
 
+import functools
 import json
+import logging
 import re
 from datetime import datetime
 from typing import Dict, Any
 
+import httpx
 from google.adk.tools.tool_context import ToolContext
-from google.genai import Client, types as genai_types
+from google.genai import Client, errors as genai_errors
 
-from models import UserProfile
+from models import UserProfile, ExtractedInfo
 
+from .gemini import get_gemini_semaphore, retry_transient, user_content
 
+
+logger = logging.getLogger(__name__)
+
+
+# Outermost {...} span in the model's reply, compiled once at import
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _parse_extraction(data: Dict[str, Any]) -> ExtractedInfo:
+    """
+    Build ExtractedInfo from the model's JSON, rejecting fields of the wrong type.
+    
+    The extraction prompt has no response schema, so the model can return
+    valid JSON in the wrong shape (e.g. a list of interests). Missing or null
+    fields are allowed and treated as empty.
+    
+    Raises:
+        TypeError: If a field has an unexpected type
+    """
+    info = ExtractedInfo.from_dict(data)
+    expected_types = {
+        "interests": (dict, type(None)),
+        "personality_traits": (list, type(None)),
+        "communication_style": (str, type(None)),
+        "factual_information": (dict, type(None)),
+    }
+    for field, types in expected_types.items():
+        if not isinstance(getattr(info, field), types):
+            raise TypeError(f"Extracted '{field}' has unexpected type {type(getattr(info, field)).__name__}")
+    return info
+
+
+@functools.lru_cache(maxsize=16)
 def create_learning_tool(client: Client, model_name: str):
     """
     Create the automated knowledge extraction tool.
@@ -23,9 +60,18 @@ def create_learning_tool(client: Client, model_name: str):
         model_name: Name of the model to use
     
     Returns:
-        The learning tool function
+        The learning tool function (cached per client/model; all per-user
+        data is read from tool_context at call time)
     """
     
+    @retry_transient
+    async def generate(prompt: str):
+        async with get_gemini_semaphore():
+            return await client.aio.models.generate_content(
+                model=model_name,
+                contents=[user_content(prompt)]
+            )
+    
     async def extract_and_learn(user_message: str, tool_context: ToolContext) -> Dict[str, Any]:
         """
         Automatically extract knowledge from user messages and update their profile.
@@ -37,20 +83,20 @@ def create_learning_tool(client: Client, model_name: str):
         Returns:
             Dict with extraction results and updated profile info
         """
-        print(f"🔧 [FUNCTION CALL] extract_and_learn() - Analyzing message for knowledge extraction")
-        print(f"   📝 Message: '{user_message[:100]}{'...' if len(user_message) > 100 else ''}'")
+        logger.debug("🔧 [FUNCTION CALL] extract_and_learn() - Analyzing message for knowledge extraction")
+        logger.debug("   📝 Message: '%.100s'", user_message)
         
         try:
-            # Get or create user profile in session state
-            if "user_profile" not in tool_context.state:
+            # Build the profile locally; session state is written once at the
+            # end, and only if something new was learned
+            profile = tool_context.state.get("user_profile")
+            if profile is None:
                 # In read-write mode, the session belongs to the user who is learning
-                # Get the user_id from the invocation context (which has the session info)
-                user_id = tool_context.invocation_context.user_id
-                empty_profile = UserProfile.create_empty(user_id)
-                tool_context.state["user_profile"] = empty_profile.to_dict()
-                print(f"   📊 Created new user profile for {user_id}")
+                user_id = tool_context.state.get("_temp_context", {}).get("target_user_id", "unknown")
+                profile = UserProfile.create_empty(user_id).to_dict()
+                logger.debug("   📊 Started new user profile for %s", user_id)
             else:
-                print(f"   📊 Using existing user profile")
+                logger.debug("   📊 Using existing user profile")
             
             # Use LLM to extract structured information
             extraction_prompt = f"""
@@ -73,62 +119,86 @@ def create_learning_tool(client: Client, model_name: str):
             Only extract clear, meaningful information. Set has_extractable_info=false for casual messages.
             """
             
-            print(f"   🤖 Calling Gemini AI for knowledge extraction...")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[genai_types.Content(
-                    role="user", 
-                    parts=[genai_types.Part.from_text(text=extraction_prompt)]
-                )]
-            )
+            logger.debug("   🤖 Calling Gemini AI for knowledge extraction...")
+            response = await generate(extraction_prompt)
             
-            if response.candidates and response.candidates[0].content.parts:
-                response_text = response.candidates[0].content.parts[0].text
-                
+            # Text of all text parts; None when the reply has no text at all
+            response_text = response.text
+            if response_text:
                 # Extract JSON from response
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+                json_match = _JSON_OBJECT_RE.search(response_text)
                 if json_match:
                     extracted_info = json.loads(json_match.group())
+                    info = _parse_extraction(extracted_info)
                     
-                    if extracted_info.get("has_extractable_info", False):
-                        print(f"   ✅ Extracted information: {extracted_info}")
+                    if info.has_extractable_info:
+                        logger.debug("   ✅ Extracted information: %s", extracted_info)
                         
                         # Update user profile with extracted information
-                        profile = tool_context.state["user_profile"]
+                        changed = False
+                        # One timestamp for every field touched by this update
+                        now = datetime.now().isoformat()
                         
                         # Update interests
-                        if extracted_info.get("interests"):
-                            profile["interests"].update(extracted_info["interests"])
-                            print(f"   🎯 Updated interests: {list(extracted_info['interests'].keys())}")
+                        if info.interests:
+                            new_interests = {
+                                name: description
+                                for name, description in info.interests.items()
+                                if profile["interests"].get(name) != description
+                            }
+                            if new_interests:
+                                profile["interests"].update(new_interests)
+                                changed = True
+                                logger.debug("   🎯 Updated interests: %s", list(new_interests))
                         
                         # Update personality traits
-                        if extracted_info.get("personality_traits"):
-                            new_traits = extracted_info["personality_traits"]
+                        if info.personality_traits:
                             existing_traits = set(profile["personality_traits"])
-                            profile["personality_traits"] = list(existing_traits.union(set(new_traits)))
-                            print(f"   🧠 Updated personality traits: {new_traits}")
+                            new_traits = set(info.personality_traits) - existing_traits
+                            if new_traits:
+                                profile["personality_traits"] = list(existing_traits.union(new_traits))
+                                changed = True
+                                logger.debug("   🧠 Updated personality traits: %s", sorted(new_traits))
                         
                         # Update communication style
-                        if extracted_info.get("communication_style"):
-                            profile["communication_style"] = extracted_info["communication_style"]
-                            print(f"   💬 Updated communication style: {extracted_info['communication_style']}")
+                        new_style = info.communication_style
+                        if new_style and new_style != profile["communication_style"]:
+                            profile["communication_style"] = new_style
+                            changed = True
+                            logger.debug("   💬 Updated communication style: %s", new_style)
                         
-                        # Update factual information
-                        if extracted_info.get("factual_information"):
-                            for fact_type, fact_value in extracted_info["factual_information"].items():
+                        # Update factual information (restated facts keep their original timestamp)
+                        if info.factual_information:
+                            updated_facts = []
+                            for fact_type, fact_value in info.factual_information.items():
+                                if profile["learned_facts"].get(fact_type, {}).get("value") == fact_value:
+                                    continue
                                 profile["learned_facts"][fact_type] = {
                                     "value": fact_value,
-                                    "learned_at": datetime.now().isoformat(),
+                                    "learned_at": now,
                                     "source_message": user_message
                                 }
-                            print(f"   📚 Updated facts: {list(extracted_info['factual_information'].keys())}")
+                                updated_facts.append(fact_type)
+                            if updated_facts:
+                                changed = True
+                                logger.debug("   📚 Updated facts: %s", updated_facts)
+                        
+                        if not changed:
+                            # Nothing new: skip the state write and its re-serialization
+                            logger.debug("   ℹ️ Extracted information is already known")
+                            return {
+                                "status": "unchanged",
+                                "message": "I already knew that about you."
+                            }
                         
-                        profile["last_updated"] = datetime.now().isoformat()
+                        # Bump the version so cached prompt serializations are rebuilt
+                        profile["_version"] = profile.get("_version", 0) + 1
+                        profile["last_updated"] = now
                         
-                        # Update the session state through tool_context
-                        # This will automatically persist to the sessions table
+                        # Single write of the whole update through tool_context;
+                        # this will automatically persist to the sessions table
                         tool_context.state["user_profile"] = profile
-                        print(f"   💾 Profile updated in session state - will be persisted automatically")
+                        logger.debug("   💾 Profile updated in session state - will be persisted automatically")
                         
                         result = {
                             "status": "learned", 
@@ -140,17 +210,20 @@ def create_learning_tool(client: Client, model_name: str):
                                 "facts_count": len(profile["learned_facts"])
                             }
                         }
-                        print(f"   ✅ Function completed successfully: {result['status']}")
+                        logger.debug("   ✅ Function completed successfully: %s", result['status'])
                         return result
                     else:
-                        print(f"   ℹ️ No extractable information found")
+                        logger.debug("   ℹ️ No extractable information found")
                         return {
                             "status": "no_extraction",
                             "message": "Continuing our conversation..."
                         }
             
-        except Exception as e:
-            print(f"   ❌ Error in knowledge extraction: {e}")
+        except (genai_errors.APIError, httpx.TransportError, json.JSONDecodeError, TypeError) as e:
+            logger.error("❌ Error in knowledge extraction: %s", e)
+        except Exception:
+            # Unexpected (e.g. malformed stored profile data): keep the runner turn alive
+            logger.exception("❌ Unexpected error in knowledge extraction")
         
         return {
             "status": "error",
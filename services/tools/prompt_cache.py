@@ -0,0 +1,208 @@
+"""
+Prompt prefix caching for the AI Representative System tools.
+Keeps the per-user part of a tool prompt serialized once per profile version
+and, once it is large enough, stored in Gemini's context cache.
+
+Gemini only caches prefixes of at least _MIN_CACHE_TOKENS tokens (roughly
+12 KB of text). Today's profiles are a few hundred bytes, so every call takes
+the inline path and the cached-content path stays dormant until profiles grow
+past that size.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+from google.genai import Client, errors as genai_errors, types as genai_types
+
+from .gemini import get_gemini_semaphore, retry_transient, user_content
+
+
+logger = logging.getLogger(__name__)
+
+
+PREFIX_CACHE_TTL_SECONDS = 600
+
+# Stop reusing a cache shortly before Gemini expires it
+_EXPIRY_MARGIN_SECONDS = 15
+
+# Gemini's minimum size for explicit cached content on the supported models
+_MIN_CACHE_TOKENS = 4096
+
+# Generous tokens-per-character estimate (JSON runs denser than prose), so a
+# prefix is only skipped when it is clearly too small to cache
+_CHARS_PER_TOKEN_ESTIMATE = 3
+
+# Gemini cached-content names keyed by (prompt kind, user_id, profile hash).
+# Keyed on the hash of the serialized profile, not ``_version``, so a profile
+# rebuilt at the same version never reuses another profile's prefix.
+# A None name marks a prefix Gemini rejected as invalid (e.g. below the minimum
+# token count) so creation is not retried until the entry expires.
+_cached_prefixes: Dict[Tuple[str, str, str], Tuple[Optional[str], float]] = {}
+
+# Serialized profile per user_id as ((version, last_updated), profile JSON, hash).
+# Kept in-process rather than in session state, which would persist a second
+# copy of the profile with every event. One entry per user: a new version
+# replaces the old one, and the least recently used users are dropped past
+# _MAX_PROFILE_PROMPTS (the same cap as the AI system's runner cache).
+_profile_prompts: "OrderedDict[str, Tuple[Tuple[int, str], str, str]]" = OrderedDict()
+_MAX_PROFILE_PROMPTS = 256
+
+
+def get_profile_prompt(user_id: str, profile: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Get the serialized profile summary used in tool prompts, plus its hash.
+
+    The summary is rebuilt only when the profile's ``_version`` (bumped by the
+    learning tool on every update) or ``last_updated`` differs from the one
+    remembered for this user; otherwise the stored string is reused verbatim.
+
+    Args:
+        user_id: User the profile belongs to
+        profile: Profile data as stored in session state
+
+    Returns:
+        Tuple of (profile JSON for the prompt, hash of that JSON)
+    """
+    version = (profile.get("_version", 0), profile.get("last_updated", "unknown"))
+    cached = _profile_prompts.get(user_id)
+    if cached is not None and cached[0] == version:
+        _profile_prompts.move_to_end(user_id)
+        return cached[1], cached[2]
+
+    user_data_summary = {
+        "interests": profile.get("interests", {}),
+        "personality_traits": profile.get("personality_traits", []),
+        "communication_style": profile.get("communication_style", "unknown"),
+        "learned_facts": profile.get("learned_facts", {}),
+        "profile_updated": profile.get("last_updated", "unknown")
+    }
+    # Compact JSON: the model doesn't need pretty-printing and every byte is billed
+    profile_str = json.dumps(user_data_summary)
+    profile_hash = hashlib.blake2b(profile_str.encode(), digest_size=16).hexdigest()
+
+    _profile_prompts[user_id] = (version, profile_str, profile_hash)
+    _profile_prompts.move_to_end(user_id)
+    while len(_profile_prompts) > _MAX_PROFILE_PROMPTS:
+        _profile_prompts.popitem(last=False)
+    return profile_str, profile_hash
+
+
+async def _get_cached_prefix(
+    client: Client,
+    model_name: str,
+    key: Tuple[str, str, str],
+    system_instruction: str,
+    profile_text: str,
+) -> Optional[str]:
+    """Get (or create) the cached content holding the instruction + profile prefix."""
+    estimated_tokens = (len(system_instruction) + len(profile_text)) // _CHARS_PER_TOKEN_ESTIMATE
+    if estimated_tokens < _MIN_CACHE_TOKENS:
+        # Far below Gemini's minimum; creating it would only cost a failed round trip
+        return None
+
+    now = time.time()
+    entry = _cached_prefixes.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    try:
+        async with get_gemini_semaphore():
+            cached_content = await client.aio.caches.create(
+                model=model_name,
+                config=genai_types.CreateCachedContentConfig(
+                    system_instruction=system_instruction,
+                    contents=[user_content(profile_text)],
+                    ttl=f"{PREFIX_CACHE_TTL_SECONDS}s"
+                )
+            )
+        name = cached_content.name
+    except genai_errors.ClientError as e:
+        if e.code != 400:
+            # Rate limits etc. are transient: send inline now, try again next call
+            logger.debug("   ℹ️ Prompt prefix cache unavailable, sending inline: %s", e)
+            return None
+        # Rejected (e.g. too small): remember that so it isn't retried every call
+        logger.debug("   ℹ️ Prompt prefix not cacheable, sending inline: %s", e)
+        name = None
+    except (genai_errors.APIError, httpx.TransportError) as e:
+        logger.debug("   ℹ️ Prompt prefix cache unavailable, sending inline: %s", e)
+        return None
+
+    # Drop expired entries (older profile versions age out this way)
+    for stale_key in [k for k, (_, expires_at) in _cached_prefixes.items() if expires_at <= now]:
+        del _cached_prefixes[stale_key]
+    _cached_prefixes[key] = (name, now + PREFIX_CACHE_TTL_SECONDS - _EXPIRY_MARGIN_SECONDS)
+    return name
+
+
+async def generate_with_profile_prefix(
+    client: Client,
+    model_name: str,
+    *,
+    kind: str,
+    user_id: str,
+    profile_hash: str,
+    system_instruction: str,
+    profile_text: str,
+    request_text: str,
+    config: Optional[Dict[str, Any]] = None,
+) -> genai_types.GenerateContentResponse:
+    """
+    Call Gemini with a per-user prompt prefix served from the context cache.
+
+    The system instruction and profile text are stored once per
+    (kind, user_id, profile_hash) as Gemini cached content, so each call
+    only sends ``request_text``. If the prefix is too small or cannot be
+    cached (currently the normal case, see the module docstring), or the
+    cache has disappeared server-side, the prefix is sent inline instead.
+
+    Args:
+        client: Gemini client for AI processing
+        model_name: Name of the model to use
+        kind: Which tool prompt this is, so different prompts don't share a cache
+        user_id: User whose profile is embedded in the prefix
+        profile_hash: Hash from ``get_profile_prompt``; a changed profile gets a new cache
+        system_instruction: Static instructions for the tool
+        profile_text: Serialized profile section of the prompt
+        request_text: Per-call question/context
+        config: Extra GenerateContentConfig fields (e.g. response schema)
+
+    Returns:
+        The Gemini response
+    """
+    config = config or {}
+    key = (kind, user_id, profile_hash)
+
+    @retry_transient
+    async def generate(contents: list, generate_config: genai_types.GenerateContentConfig):
+        async with get_gemini_semaphore():
+            return await client.aio.models.generate_content(
+                model=model_name,
+                contents=contents,
+                config=generate_config
+            )
+
+    cached_prefix = await _get_cached_prefix(client, model_name, key, system_instruction, profile_text)
+    if cached_prefix:
+        try:
+            return await generate(
+                [user_content(request_text)],
+                genai_types.GenerateContentConfig(cached_content=cached_prefix, **config)
+            )
+        except genai_errors.ClientError as e:
+            if e.code not in (403, 404):
+                raise
+            # Expired or evicted on Gemini's side; forget it and fall back to inline
+            logger.debug("   ℹ️ Cached prompt prefix unusable, sending inline: %s", e)
+            _cached_prefixes.pop(key, None)
+
+    return await generate(
+        [user_content(profile_text, request_text)],
+        genai_types.GenerateContentConfig(system_instruction=system_instruction, **config)
+    )
+
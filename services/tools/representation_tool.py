@@ -3,13 +3,33 @@ Representation tool for the AI Representative System.
 Handles representing users to others based on learned profiles.
 """
 
-import json
+import functools
+import logging
 from typing import Dict, Any
 
+import httpx
 from google.adk.tools.tool_context import ToolContext
-from google.genai import Client, types as genai_types
+from google.genai import Client, errors as genai_errors
 
+from .prompt_cache import generate_with_profile_prefix, get_profile_prompt
+from .response_cache import ResponseCache
 
+
+logger = logging.getLogger(__name__)
+
+
+# Representations reused while the context and the user's profile are unchanged
+_representation_cache = ResponseCache()
+
+REPRESENTATION_INSTRUCTION = """
+You are representing a user based on their learned profile. Respond as they would.
+Respond as this user would respond, incorporating their interests, personality, and communication style.
+Be authentic to their profile while being helpful and appropriate.
+Make reasonable inferences from the available data (e.g., if they play piano, they probably prefer piano as an instrument).
+"""
+
+
+@functools.lru_cache(maxsize=16)
 def create_representation_tool(client: Client, model_name: str):
     """
     Create the user representation tool for cross-user interactions.
@@ -19,7 +39,8 @@ def create_representation_tool(client: Client, model_name: str):
         model_name: Name of the model to use
     
     Returns:
-        The representation tool function
+        The representation tool function, shared by every agent built with
+        the same client and model
     """
     
     async def represent_user(context: str, tool_context: ToolContext) -> Dict[str, Any]:
@@ -37,66 +58,73 @@ def create_representation_tool(client: Client, model_name: str):
         temp_context = tool_context.state.get("_temp_context", {})
         target_user_id_from_context = temp_context.get("target_user_id", "unknown")
 
-        print(f"🎭 [FUNCTION CALL] represent_user() - Representing user to others")
-        print(f"   🎯 Target User (from context): {target_user_id_from_context}")
-        print(f"   📝 Context: '{context[:100]}{'...' if len(context) > 100 else ''}'")
+        logger.debug("🎭 [FUNCTION CALL] represent_user() target=%s context='%.100s'", target_user_id_from_context, context)
         
         try:
             if "user_profile" not in tool_context.state:
-                print(f"   ❌ No user profile found in session state for {target_user_id_from_context}")
+                logger.debug("   ❌ No user profile found in session state for %s", target_user_id_from_context)
                 return {
                     "status": "no_profile",
                     "message": "I don't have enough information about that user yet."
                 }
             
             profile = tool_context.state["user_profile"]
-            print(f"   📊 Found user profile for representation")
-            print(f"      - Interests: {list(profile.get('interests', {}).keys())}")
-            print(f"      - Personality Traits: {profile.get('personality_traits', [])}")
-            print(f"      - Communication Style: {profile.get('communication_style', 'friendly')}")
-            
-            print(f"   🤖 Calling Gemini AI to generate user representation...")
-            
-            # Generate representation based on learned profile
-            representation_prompt = f"""
-            You are representing a user based on their learned profile. Respond as they would.
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "   📊 Found user profile for representation: interests=%s traits=%s style=%s",
+                    list(profile.get('interests', {}).keys()),
+                    profile.get('personality_traits', []),
+                    profile.get('communication_style', 'friendly')
+                )
             
-            User Profile:
-            - Interests: {json.dumps(profile.get('interests', {}), indent=2)}
-            - Personality Traits: {profile.get('personality_traits', [])}
-            - Communication Style: {profile.get('communication_style', 'friendly')}
-            - Known Facts: {json.dumps(profile.get('learned_facts', {}), indent=2)}
-            
-            Context/Question: {context}
+            profile_str, profile_hash = get_profile_prompt(
+                profile.get('user_id', target_user_id_from_context),
+                profile
+            )
+            cache_key = ResponseCache.make_key(
+                profile.get('user_id', target_user_id_from_context),
+                profile_hash,
+                context
+            )
+            cached_result = _representation_cache.get(cache_key)
+            if cached_result is not None:
+                logger.debug("   ⚡ Returning cached representation for unchanged profile")
+                return cached_result
             
-            Respond as this user would respond, incorporating their interests, personality, and communication style.
-            Be authentic to their profile while being helpful and appropriate.
-            Make reasonable inferences from the available data (e.g., if they play piano, they probably prefer piano as an instrument).
-            """
+            logger.debug("   🤖 Calling Gemini AI to generate user representation...")
             
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[genai_types.Content(
-                    role="user",
-                    parts=[genai_types.Part.from_text(text=representation_prompt)]
-                )]
+            # Generate representation based on learned profile; the instructions
+            # and profile are served from Gemini's context cache when possible
+            response = await generate_with_profile_prefix(
+                client,
+                model_name,
+                kind="representation",
+                user_id=profile.get('user_id', target_user_id_from_context),
+                profile_hash=profile_hash,
+                system_instruction=REPRESENTATION_INSTRUCTION,
+                profile_text=f"User Profile:\n{profile_str}",
+                request_text=f"Context/Question: {context}"
             )
             
             if response.candidates and response.candidates[0].content.parts:
                 representation_text = response.candidates[0].content.parts[0].text
-                print(f"   ✅ Generated representation: '{representation_text[:100]}{'...' if len(representation_text) > 100 else ''}'")
+                logger.debug("   ✅ Generated representation: '%.100s'", representation_text)
                 
                 result = {
                     "status": "represented",
                     "message": representation_text,
                     "represented_user": target_user_id_from_context
                 }
+                _representation_cache.set(cache_key, result)
                 
-                print(f"   ✅ Function completed successfully: {result['status']}")
+                logger.debug("   ✅ Function completed successfully: %s", result['status'])
                 return result
             
-        except Exception as e:
-            print(f"   ❌ Error in user representation: {e}")
+        except (genai_errors.APIError, httpx.TransportError) as e:
+            logger.error("❌ Error in user representation: %s", e)
+        except Exception:
+            # Unexpected (e.g. malformed stored profile data): keep the runner turn alive
+            logger.exception("❌ Unexpected error in user representation")
         
         return {
             "status": "error",
@@ -0,0 +1,57 @@
+"""
+Response cache for the AI Representative System tools.
+Reuses Gemini answers for repeated requests against an unchanged user profile.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+CacheKey = Tuple[str, str, str]
+
+
+class ResponseCache:
+    """
+    Bounded, time-limited cache of tool results.
+
+    Entries are keyed on (user_id, profile_hash, normalized_text). Because the
+    profile hash is part of the key, learning anything new about a user makes
+    their old entries unreachable; they then age out through the TTL or the
+    size bound.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(user_id: str, profile_hash: str, text: str) -> CacheKey:
+        """Build a cache key, normalizing case and whitespace of the request text."""
+        return (user_id, profile_hash, " ".join(text.lower().split()))
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(result)
+
+    def set(self, key: CacheKey, result: Dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic(), dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._entries.clear()
@@ -3,14 +3,105 @@ Smart retrieval tool for the AI Representative System.
 Handles intelligent data retrieval and answering questions about users.
 """
 
-import json
+import functools
+import logging
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Literal, Optional, Tuple
 
+import httpx
 from google.adk.tools.tool_context import ToolContext
-from google.genai import Client, types as genai_types
+from google.genai import Client, errors as genai_errors
+from pydantic import BaseModel, Field, ValidationError
 
+from .prompt_cache import generate_with_profile_prefix, get_profile_prompt
+from .response_cache import ResponseCache
 
+
+logger = logging.getLogger(__name__)
+
+
+# Answers reused while the question and the user's profile are unchanged
+_answer_cache = ResponseCache()
+
+
+class AnswerSchema(BaseModel):
+    """Structured answer Gemini must return for a question about a user."""
+    answer: str = Field(description="Direct answer to the question")
+    confidence: Literal["high", "medium", "low"]
+    reasoning: str = Field(description="Explanation of what data supports this answer")
+    supporting_data: List[str] = Field(description="Relevant data points from the profile")
+    inference_made: bool
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@functools.lru_cache(maxsize=256)
+def _humanize(key: str) -> str:
+    """Turn a stored key like 'favorite_food' into 'favorite food'."""
+    return key.replace('_', ' ')
+
+
+# Only "what/which ... is" questions are treated as direct lookups; other
+# interrogatives (where/when/how/who) stay content words and go to Gemini
+_LOOKUP_QUESTION_WORDS = frozenset(("what", "whats", "which"))
+
+# Words that carry no subject matter in a direct lookup like "what is my job?"
+_LOOKUP_FILLER_WORDS = _LOOKUP_QUESTION_WORDS | frozenset((
+    "is", "are", "was", "were", "am",
+    "the", "a", "an", "s", "of",
+    "i", "me", "my", "you", "your", "he", "his", "him", "she", "her", "they", "their", "them",
+))
+
+
+def _match_stored_fact(
+    question: str,
+    learned_facts: Dict[str, Any],
+    user_id: str = ""
+) -> Optional[Tuple[str, Any]]:
+    """
+    Find the learned fact a question asks for directly, if there is exactly one.
+    
+    Only plain "what/which ... is" lookups qualify: after dropping filler words
+    and the user's own name, the remaining words must be exactly the words of
+    one fact key ("What is my favorite food?" -> favorite_food). Anything that
+    says more ("What is my dog's name?", "Where is my job?") goes to Gemini.
+    
+    Args:
+        question: The question being asked about the user
+        learned_facts: The profile's learned_facts mapping
+        user_id: The user's id, so "What is Alice's job?" still counts as a lookup
+    
+    Returns:
+        (fact_key, fact_value) for an unambiguous match, otherwise None
+    """
+    question_words = set(_WORD_RE.findall(question.lower()))
+    if question_words.isdisjoint(_LOOKUP_QUESTION_WORDS):
+        return None
+    
+    ignored_words = _LOOKUP_FILLER_WORDS.union(_WORD_RE.findall(user_id.lower()))
+    content_words = question_words - ignored_words
+    if not content_words:
+        return None
+    
+    matches = [
+        (fact_key, fact.get("value"))
+        for fact_key, fact in learned_facts.items()
+        if isinstance(fact, dict) and set(_WORD_RE.findall(fact_key.lower())) == content_words
+    ]
+    if len(matches) != 1 or matches[0][1] in (None, ""):
+        return None
+    return matches[0]
+
+
+ANALYSIS_INSTRUCTION = """
+Answer questions about a user from their stored profile data.
+Check all of the data and make reasonable inferences (e.g. "plays piano" suggests piano is their favorite instrument).
+Say honestly when the data is insufficient, and always state which data the answer is based on.
+"""
+
+
+@functools.lru_cache(maxsize=16)
 def create_smart_retrieval_tool(client: Client, model_name: str):
     """
     Create intelligent data retrieval tool for answering questions about users.
@@ -20,7 +111,7 @@ def create_smart_retrieval_tool(client: Client, model_name: str):
         model_name: Name of the model to use
     
     Returns:
-        The smart retrieval tool function
+        The smart retrieval tool function (memoized, safe to reuse across users)
     """
     
     async def smart_answer_about_user(question: str, tool_context: ToolContext) -> Dict[str, Any]:
@@ -38,25 +129,26 @@ def create_smart_retrieval_tool(client: Client, model_name: str):
         temp_context = tool_context.state.get("_temp_context", {})
         target_user_id_from_context = temp_context.get("target_user_id", "unknown")
 
-        print(f"🧠 [FUNCTION CALL] smart_answer_about_user() - Analyzing stored data for intelligent answers")
-        print(f"   ❓ Question: '{question[:100]}{'...' if len(question) > 100 else ''}'")
-        print(f"   🎯 Target User (from context): {target_user_id_from_context}")
+        logger.debug("🧠 [FUNCTION CALL] smart_answer_about_user() target=%s question='%.100s'", target_user_id_from_context, question)
         
         try:
             # Get user's profile data from the current session state.
             # NOTE: The session is for target_user_id, so tool_context is correct.
             if "user_profile" not in tool_context.state:
-                print(f"   ❌ No user profile found in session state for {target_user_id_from_context}")
+                logger.debug("   ❌ No user profile found in session state for %s", target_user_id_from_context)
                 return {
                     "status": "no_data",
                     "message": f"I don't have any information about {target_user_id_from_context} yet. If you are this user, please share something about yourself."
                 }
             
             profile = tool_context.state["user_profile"]
-            print(f"   📊 Found user profile for analysis")
-            print(f"      - Interests: {list(profile.get('interests', {}).keys())}")
-            print(f"      - Personality Traits: {profile.get('personality_traits', [])}")
-            print(f"      - Facts: {list(profile.get('learned_facts', {}).keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "   📊 Found user profile for analysis: interests=%s traits=%s facts=%s",
+                    list(profile.get('interests', {}).keys()),
+                    profile.get('personality_traits', []),
+                    list(profile.get('learned_facts', {}).keys())
+                )
             
             # Check if the profile is actually empty (no real data learned yet)
             has_interests = bool(profile.get('interests', {}))
@@ -65,102 +157,101 @@ def create_smart_retrieval_tool(client: Client, model_name: str):
             has_communication_style = bool(profile.get('communication_style', '').strip())
             
             if not (has_interests or has_traits or has_facts or has_communication_style):
-                print(f"   ℹ️ Profile exists but contains no learned data yet")
+                logger.debug("   ℹ️ Profile exists but contains no learned data yet")
                 return {
                     "status": "no_data",
                     "message": "I don't have any information about you yet. Please share something about yourself so I can learn about you!"
                 }
             
-            # Create comprehensive data summary for AI analysis
-            user_data_summary = {
-                "interests": profile.get('interests', {}),
-                "personality_traits": profile.get('personality_traits', []),
-                "communication_style": profile.get('communication_style', 'unknown'),
-                "learned_facts": profile.get('learned_facts', {}),
-                "profile_updated": profile.get('last_updated', 'unknown')
-            }
-            
-            # Use AI to analyze data and answer with inference
-            analysis_prompt = f"""
-            You are an intelligent assistant that can answer questions about a user based on their stored profile data.
-            Use the available information to provide helpful answers, making reasonable inferences when appropriate.
-            
-            USER PROFILE DATA:
-            {json.dumps(user_data_summary, indent=2)}
-            
-            QUESTION: "{question}"
-            
-            Instructions:
-            1. Look through ALL the stored data for relevant information
-            2. Make reasonable inferences based on the data (e.g., if they "play piano", piano is likely a favorite instrument)
-            3. If you have relevant information, provide a confident answer with reasoning
-            4. If the data is insufficient, say so honestly
-            5. Always explain what data you're basing your answer on
-            
-            Examples of good inference:
-            - "plays piano" → piano is probably their favorite/preferred instrument
-            - "loves hiking" + "works outdoors" → they probably enjoy nature/outdoor activities
-            - "software engineer" + "loves puzzles" → they probably enjoy problem-solving
+            # Direct lookups of a stored fact don't need Gemini at all
+            fact_match = _match_stored_fact(
+                question,
+                profile.get('learned_facts', {}),
+                profile.get('user_id', target_user_id_from_context)
+            )
+            if fact_match is not None:
+                fact_key, fact_value = fact_match
+                logger.debug("   ⚡ Answered from stored fact '%s' without calling Gemini", fact_key)
+                return {
+                    "status": "answered",
+                    "message": f"{fact_value} (Based on stored data: {_humanize(fact_key)})",
+                    "answer": str(fact_value),
+                    "confidence": "high",
+                    "inference_made": False,
+                    "supporting_data": [fact_key]
+                }
             
-            Respond in this format:
-            {{
-                "answer": "Direct answer to the question",
-                "confidence": "high/medium/low",
-                "reasoning": "Explanation of what data supports this answer",
-                "supporting_data": ["list", "of", "relevant", "data", "points"],
-                "inference_made": true/false
-            }}
-            """
+            # Comprehensive data summary for AI analysis, serialized once per profile version
+            profile_str, profile_hash = get_profile_prompt(
+                profile.get('user_id', target_user_id_from_context),
+                profile
+            )
+            cache_key = ResponseCache.make_key(
+                profile.get('user_id', target_user_id_from_context),
+                profile_hash,
+                question
+            )
+            cached_result = _answer_cache.get(cache_key)
+            if cached_result is not None:
+                logger.debug("   ⚡ Returning cached answer for unchanged profile")
+                return cached_result
             
-            print(f"   🤖 Calling Gemini AI for intelligent analysis...")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[genai_types.Content(
-                    role="user",
-                    parts=[genai_types.Part.from_text(text=analysis_prompt)]
-                )]
+            # Instructions + profile are served from Gemini's context cache when
+            # possible; the question is the only per-call input
+            logger.debug("   🤖 Calling Gemini AI for intelligent analysis...")
+            response = await generate_with_profile_prefix(
+                client,
+                model_name,
+                kind="analysis",
+                user_id=profile.get('user_id', target_user_id_from_context),
+                profile_hash=profile_hash,
+                system_instruction=ANALYSIS_INSTRUCTION,
+                profile_text=f"USER PROFILE DATA:\n{profile_str}",
+                request_text=f'QUESTION: "{question}"',
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": AnswerSchema
+                }
             )
             
-            if response.candidates and response.candidates[0].content.parts:
-                response_text = response.candidates[0].content.parts[0].text
+            analysis_result = response.parsed
+            if isinstance(analysis_result, AnswerSchema):
+                # Format the response nicely
+                answer = analysis_result.answer
+                confidence = analysis_result.confidence
+                reasoning = analysis_result.reasoning
+                supporting_data = analysis_result.supporting_data
+                inference_made = analysis_result.inference_made
+                
+                # Create response message
+                response_parts = [answer]
                 
-                # Extract JSON from response
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    analysis_result = json.loads(json_match.group())
-                    
-                    # Format the response nicely
-                    answer = analysis_result.get("answer", "I couldn't determine an answer.")
-                    confidence = analysis_result.get("confidence", "low")
-                    reasoning = analysis_result.get("reasoning", "No clear reasoning available.")
-                    supporting_data = analysis_result.get("supporting_data", [])
-                    inference_made = analysis_result.get("inference_made", False)
-                    
-                    # Create response message
-                    response_parts = [answer]
-                    
-                    if inference_made:
-                        response_parts.append(f"(This is an inference based on: {reasoning})")
-                    else:
-                        response_parts.append(f"(Based on stored data: {reasoning})")
-                    
-                    if supporting_data:
-                        response_parts.append(f"Supporting information: {', '.join(supporting_data)}")
-                    
-                    result = {
-                        "status": "answered",
-                        "message": " ".join(response_parts),
-                        "answer": answer,
-                        "confidence": confidence,
-                        "inference_made": inference_made,
-                        "supporting_data": supporting_data
-                    }
-                    
-                    print(f"   ✅ Function completed successfully: {result['status']}")
-                    return result
+                if inference_made:
+                    response_parts.append(f"(This is an inference based on: {reasoning})")
+                else:
+                    response_parts.append(f"(Based on stored data: {reasoning})")
+                
+                if supporting_data:
+                    response_parts.append(f"Supporting information: {', '.join(supporting_data)}")
+                
+                result = {
+                    "status": "answered",
+                    "message": " ".join(response_parts),
+                    "answer": answer,
+                    "confidence": confidence,
+                    "inference_made": inference_made,
+                    "supporting_data": supporting_data
+                }
+                _answer_cache.set(cache_key, result)
+                
+                logger.debug("   ✅ Function completed successfully: %s", result['status'])
+                return result
             
-        except Exception as e:
-            print(f"Error in smart retrieval: {e}")
+        except (genai_errors.APIError, httpx.TransportError, ValidationError) as e:
+            logger.error("❌ Error in smart retrieval: %s", e)
+        except Exception:
+            # Unexpected (e.g. malformed stored profile data): keep the runner turn alive
+            logger.exception("❌ Unexpected error in smart retrieval")
         
         return {
             "status": "error",
@@ -169,3 +260,4 @@ def create_smart_retrieval_tool(client: Client, model_name: str):
     
     # Return the function directly - ADK will handle tool registration
     return smart_answer_about_user
+